@@ -1,11 +1,14 @@
 import discord
 from discord import app_commands
 from discord.ext import commands
-import asyncio, aiohttp, json, os, re
+import asyncio, aiohttp, hashlib, orjson, os, re, sqlite3, threading, time
 from dotenv import load_dotenv
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from collections import Counter
+from collections import Counter, OrderedDict
 import torch
+import numpy as np
+import onnxruntime as ort
+from onnxruntime.quantization import quantize_dynamic, QuantType
 
 # -------------------- Configuration --------------------
 load_dotenv()
@@ -15,14 +18,53 @@ DEBUG_LEVEL = os.getenv("DEBUG_LEVEL", "none").lower()  # none, error, mod, all
 
 ENABLE_TOXICITY = os.getenv("ENABLE_TOXICITY", "True").lower() == "true"
 ENABLE_TRANSLATION = os.getenv("ENABLE_TRANSLATION", "True").lower() == "true"
+SYNC_COMMANDS = os.getenv("SYNC_COMMANDS", "False").lower() == "true"
+SYNC_GUILD_ID = int(os.getenv("SYNC_GUILD_ID", "0"))
 TRANSLATE_URL = os.getenv("LIBRETRANSLATE_URL", "http://localhost:5000/translate")
+# Defaults to torch when a GPU is present, since the INT8 ONNX model only runs on CPU
+TOXICITY_BACKEND = os.getenv("TOXICITY_BACKEND", "").lower() or ("torch" if torch.cuda.is_available() else "onnx")  # onnx, torch
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", "onnx_models")
+TOXICITY_BATCH_SIZE = int(os.getenv("TOXICITY_BATCH_SIZE", "32"))
+TOXICITY_MAX_WAIT_MS = int(os.getenv("TOXICITY_MAX_WAIT_MS", "20"))
+# Defaults to half the logical CPUs, which matches the physical core count on SMT hosts
+INFERENCE_THREADS = int(os.getenv("INFERENCE_THREADS", "0")) or max(1, (os.cpu_count() or 1) // 2)
 
 INTENTS = discord.Intents.default()
 INTENTS.message_content = True
 INTENTS.guilds = True
 INTENTS.messages = True
 
-bot = commands.Bot(command_prefix="!", intents=INTENTS)
+class GloBot(commands.Bot):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Shared by translation and webhook sends; created in setup_hook
+        self.http_session: aiohttp.ClientSession | None = None
+
+    async def setup_hook(self):
+        # Runs once before the gateway connects, so events never see these missing
+        global _FLUSH_TASK
+        self.http_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, limit_per_host=32, keepalive_timeout=60, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=5),
+            json_serialize=lambda obj: orjson.dumps(obj).decode(),
+        )
+        # Registered only to route clicks on prompts from before a restart; never sent itself,
+        # since sending a view ephemerally gives it a timeout that would end it for every prompt
+        self.add_view(ToSView())
+        if ENABLE_TOXICITY:
+            batcher.start()
+        _FLUSH_TASK = asyncio.create_task(flush_loop())
+
+    async def close(self):
+        await super().close()
+        # Flush only once the gateway is closed, so no event handler can queue a write afterwards
+        if _FLUSH_TASK is not None:
+            _FLUSH_TASK.cancel()
+        flush_pending()
+        if self.http_session and not self.http_session.closed:
+            await self.http_session.close()
+
+bot = GloBot(command_prefix="!", intents=INTENTS)
 
 # -------------------- Debugging --------------------
 def debug_log(level: str, message: str):
@@ -31,32 +73,370 @@ def debug_log(level: str, message: str):
         print(f"[{level.upper()}] {message}")
 
 # -------------------- Data Handling --------------------
-if not os.path.exists("data.json"):
-    with open("data.json", "w") as f:
-        json.dump({"channels": {}, "logs": {}, "warnings": {}, "webhooks": {}}, f)
+DB_PATH = "data.db"
+LEGACY_DATA_PATH = "data.json"
+
+db = sqlite3.connect(DB_PATH, isolation_level=None, check_same_thread=False)
+_DB_LOCK = threading.Lock()
+db.execute("PRAGMA journal_mode=WAL")
+db.execute("PRAGMA synchronous=NORMAL")
+db.executescript("""
+CREATE TABLE IF NOT EXISTS channels (cid INTEGER PRIMARY KEY, lang TEXT NOT NULL, guild_id INTEGER NOT NULL, channel_id INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS logs (guild_id INTEGER PRIMARY KEY, channel_id INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS warnings (guild_id INTEGER, user_id INTEGER, count INTEGER NOT NULL, PRIMARY KEY (guild_id, user_id));
+CREATE TABLE IF NOT EXISTS webhooks (channel_id INTEGER PRIMARY KEY, webhook_id INTEGER NOT NULL, token TEXT);
+""")
+if "token" not in [row[1] for row in db.execute("PRAGMA table_info(webhooks)")]:
+    db.execute("ALTER TABLE webhooks ADD COLUMN token TEXT")
 
 def load_data():
-    with open("data.json", "r") as f:
-        return json.load(f)
+    """Build the in-memory mirror used by all read paths."""
+    data = {"channels": {}, "logs": {}, "warnings": {}, "webhooks": {}}
+    for cid, lang, guild_id, channel_id in db.execute("SELECT cid, lang, guild_id, channel_id FROM channels"):
+        data["channels"][cid] = {"lang": lang, "guild_id": guild_id, "channel_id": channel_id}
+    for guild_id, channel_id in db.execute("SELECT guild_id, channel_id FROM logs"):
+        data["logs"][guild_id] = channel_id
+    for guild_id, user_id, count in db.execute("SELECT guild_id, user_id, count FROM warnings"):
+        data["warnings"].setdefault(guild_id, {})[user_id] = count
+    for channel_id, webhook_id, token in db.execute("SELECT channel_id, webhook_id, token FROM webhooks"):
+        data["webhooks"][channel_id] = {"id": webhook_id, "token": token}
+    return data
+
+def save_channel(cid: int):
+    info = data["channels"][cid]
+    db.execute(
+        "INSERT OR REPLACE INTO channels (cid, lang, guild_id, channel_id) VALUES (?, ?, ?, ?)",
+        (cid, info["lang"], info["guild_id"], info["channel_id"]),
+    )
+
+def delete_channel(cid: int):
+    db.execute("DELETE FROM channels WHERE cid = ?", (cid,))
+
+def save_logs(guild_id: int):
+    db.execute(
+        "INSERT OR REPLACE INTO logs (guild_id, channel_id) VALUES (?, ?)",
+        (guild_id, data["logs"][guild_id]),
+    )
 
-def save_data(data):
-    with open("data.json", "w") as f:
-        json.dump(data, f, indent=2)
+def save_warning(guild_id: int, user_id: int):
+    db.execute(
+        "INSERT OR REPLACE INTO warnings (guild_id, user_id, count) VALUES (?, ?, ?)",
+        (guild_id, user_id, data["warnings"][guild_id][user_id]),
+    )
+
+def save_webhook(channel_id: int):
+    webhook = data["webhooks"].get(channel_id)
+    if webhook is None:
+        # Dropped after Discord reported it deleted and not yet re-resolved
+        db.execute("DELETE FROM webhooks WHERE channel_id = ?", (channel_id,))
+        return
+    db.execute(
+        "INSERT OR REPLACE INTO webhooks (channel_id, webhook_id, token) VALUES (?, ?, ?)",
+        (channel_id, webhook["id"], webhook["token"]),
+    )
+
+# Hot-path writes are queued here and committed together by flush_loop. Entries are keyed by
+# (writer, *row key) and writers read the current value at flush time, so repeated updates to
+# the same row between flushes collapse into a single write.
+FLUSH_INTERVAL = 1.0
+_PENDING: dict[tuple, None] = {}
+_DIRTY = asyncio.Event()
+_FLUSH_TASK: asyncio.Task | None = None
+
+def mark_dirty(writer, *args):
+    _PENDING[(writer, *args)] = None
+    _DIRTY.set()
+
+def write_now(writer, *args):
+    with _DB_LOCK:
+        writer(*args)
+
+def write_batch(pending: list[tuple]):
+    with _DB_LOCK, db:
+        db.execute("BEGIN")
+        for writer, *args in pending:
+            writer(*args)
+
+def write_each(pending: list[tuple]) -> list[tuple]:
+    """Write rows one at a time after a batch failed; return the ones that hit a database error."""
+    failed = []
+    for writer, *args in pending:
+        try:
+            with _DB_LOCK:
+                writer(*args)
+        except sqlite3.Error as e:
+            debug_log("error", f"Failed to write {writer.__name__}{tuple(args)}: {e}")
+            failed.append((writer, *args))
+        except Exception as e:
+            debug_log("error", f"Dropping write {writer.__name__}{tuple(args)}: {e}")
+    return failed
+
+def take_pending() -> list[tuple]:
+    pending = list(_PENDING)
+    _PENDING.clear()
+    return pending
+
+def flush_pending():
+    if _PENDING:
+        pending = take_pending()
+        try:
+            write_batch(pending)
+        except Exception as e:
+            debug_log("error", f"Failed to flush data, retrying row by row: {e}")
+            write_each(pending)
+
+async def flush_loop():
+    while True:
+        await _DIRTY.wait()
+        # Wait before flushing so the first write of a burst is batched with the rest
+        await asyncio.sleep(FLUSH_INTERVAL)
+        _DIRTY.clear()
+        pending = take_pending()
+        try:
+            await asyncio.to_thread(write_batch, pending)
+        except Exception as e:
+            debug_log("error", f"Failed to flush data, retrying row by row: {e}")
+            retry = await asyncio.to_thread(write_each, pending)
+            if retry:
+                # Database errors may be transient (e.g. locked); requeue them for the next pass
+                for key in retry:
+                    _PENDING.setdefault(key, None)
+                _DIRTY.set()
 
 data = load_data()
 
+# One-time import of the old JSON store
+if os.path.exists(LEGACY_DATA_PATH) and not any(data.values()):
+    with open(LEGACY_DATA_PATH, "rb") as f:
+        legacy = orjson.loads(f.read())
+    data = {
+        "channels": {int(cid): info for cid, info in legacy.get("channels", {}).items()},
+        "logs": {int(guild_id): channel_id for guild_id, channel_id in legacy.get("logs", {}).items()},
+        "warnings": {
+            int(guild_id): {int(user_id): count for user_id, count in users.items()}
+            for guild_id, users in legacy.get("warnings", {}).items()
+        },
+        "webhooks": {int(cid): {"id": wh_id, "token": None} for cid, wh_id in legacy.get("webhooks", {}).items()},
+    }
+    write_batch(
+        [(save_channel, cid) for cid in data["channels"]]
+        + [(save_logs, guild_id) for guild_id in data["logs"]]
+        + [(save_warning, guild_id, user_id) for guild_id, users in data["warnings"].items() for user_id in users]
+        + [(save_webhook, channel_id) for channel_id in data["webhooks"]]
+    )
+    os.replace(LEGACY_DATA_PATH, LEGACY_DATA_PATH + ".migrated")
+    data = load_data()
+
+# -------------------- Forwarding Index --------------------
+# lang -> [(guild_id, channel_id)] of every synced channel, rebuilt only on add/remove
+SYNC_INDEX: dict[str, list[tuple[int, int]]] = {}
+# Resolved channel objects, so guild/channel lookups only happen on a miss
+_CHANNEL_CACHE: dict[int, discord.TextChannel] = {}
+
+def rebuild_sync_index():
+    SYNC_INDEX.clear()
+    for info in data["channels"].values():
+        SYNC_INDEX.setdefault(info["lang"], []).append((info["guild_id"], info["channel_id"]))
+
+rebuild_sync_index()
+
+def evict_guild_channels(guild_id: int):
+    for channel_id in [cid for cid, channel in _CHANNEL_CACHE.items() if channel.guild.id == guild_id]:
+        del _CHANNEL_CACHE[channel_id]
+
+async def _resolve_targets(source_id: int) -> list[tuple[discord.TextChannel, str]]:
+    resolved = []
+    for lang, channels in SYNC_INDEX.items():
+        for guild_id, channel_id in channels:
+            if channel_id == source_id:
+                continue
+            target_channel = _CHANNEL_CACHE.get(channel_id)
+            if target_channel is None:
+                guild = bot.get_guild(guild_id)
+                target_channel = guild.get_channel(channel_id) if guild else None
+                if target_channel is None:
+                    continue
+                _CHANNEL_CACHE[channel_id] = target_channel
+            resolved.append((target_channel, lang))
+    return resolved
+
+# Per-language channel counts for /stats, kept up to date by add/remove
+LANG_COUNTS = Counter(info["lang"] for info in data["channels"].values())
+
+def uncount_lang(lang: str):
+    LANG_COUNTS[lang] -= 1
+    if LANG_COUNTS[lang] <= 0:
+        del LANG_COUNTS[lang]
+
 # -------------------- Toxicity Model --------------------
 if ENABLE_TOXICITY:
     MODEL_NAME = "unitary/toxic-bert"
+    # Exported models are cached per model name so later starts skip the export
+    ONNX_DIR = os.path.join(ONNX_CACHE_DIR, MODEL_NAME.replace("/", "--"))
+    ONNX_PATH = os.path.join(ONNX_DIR, "model.onnx")
+    ONNX_INT8_PATH = os.path.join(ONNX_DIR, "model.int8.onnx")
     tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-    model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
     labels = ["toxic", "severe_toxic", "obscene", "threat", "insult", "identity_hate"]
+    MAX_LENGTH = 128
+
+    if TOXICITY_BACKEND == "onnx":
+        def export_onnx_model():
+            """Export toxic-bert to ONNX and quantize its weights to INT8."""
+            os.makedirs(ONNX_DIR, exist_ok=True)
+            model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
+            model.eval()
+            dummy = tokenizer("warmup", return_tensors="pt")
+            torch.onnx.export(
+                model,
+                (dummy["input_ids"], dummy["attention_mask"]),
+                ONNX_PATH,
+                input_names=["input_ids", "attention_mask"],
+                output_names=["logits"],
+                dynamic_axes={
+                    "input_ids": {0: "batch", 1: "sequence"},
+                    "attention_mask": {0: "batch", 1: "sequence"},
+                    "logits": {0: "batch"},
+                },
+                opset_version=14,
+            )
+            # Write to a temporary name so an interrupted export is never mistaken for a cached model
+            tmp_path = ONNX_INT8_PATH + ".tmp"
+            quantize_dynamic(ONNX_PATH, tmp_path, weight_type=QuantType.QInt8)
+            os.replace(tmp_path, ONNX_INT8_PATH)
+            os.remove(ONNX_PATH)
+
+        if not os.path.exists(ONNX_INT8_PATH):
+            debug_log("all", f"Exporting {MODEL_NAME} to {ONNX_INT8_PATH}")
+            export_onnx_model()
+
+        sess_options = ort.SessionOptions()
+        sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        sess_options.intra_op_num_threads = INFERENCE_THREADS
+        sess_options.inter_op_num_threads = 1
+        ort_session = ort.InferenceSession(ONNX_INT8_PATH, sess_options, providers=["CPUExecutionProvider"])
+
+        def run_model(inputs) -> np.ndarray:
+            return ort_session.run(None, {
+                "input_ids": inputs["input_ids"],
+                "attention_mask": inputs["attention_mask"],
+            })[0]
+    else:
+        DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        ipex = None
+        if DEVICE.type == "cpu":
+            try:
+                import intel_extension_for_pytorch as ipex
+            except ImportError:
+                pass
+        # One intra-op pool sized to the physical cores; the batcher never runs two forwards at once
+        torch.set_num_threads(INFERENCE_THREADS)
+        torch.set_num_interop_threads(1)
+        # SDPA runs attention through PyTorch's fused scaled_dot_product_attention kernel
+        model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME, attn_implementation="sdpa")
+        model.eval()
+        if DEVICE.type == "cuda":
+            model = model.to(DEVICE, dtype=torch.float16)
+        elif ipex:
+            # Fused BF16 BERT kernels (AMX/AVX-512) replace INT8 quantization when IPEX is installed
+            model = ipex.fast_bert(model, dtype=torch.bfloat16)
+        else:
+            model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        if DEVICE.type == "cpu":
+            model.share_memory()
+        USE_BF16 = ipex is not None
+        eager_model = model
+        example = tokenizer("warmup", return_tensors="pt", truncation=True, max_length=MAX_LENGTH)
+        example_inputs = (example["input_ids"].to(DEVICE), example["attention_mask"].to(DEVICE))
+        try:
+            # Batch size and padded length vary per call, so compile one shape-generic graph
+            # rather than CUDA graphs ("reduce-overhead") that re-record for every new shape
+            compiled = torch.compile(model, dynamic=True)
+            with torch.inference_mode(), torch.autocast("cpu", dtype=torch.bfloat16, enabled=USE_BF16):
+                compiled(*example_inputs)
+            model = compiled
+        except Exception as e:
+            debug_log("error", f"torch.compile unavailable, falling back to TorchScript: {e}")
+            with torch.inference_mode(), torch.autocast("cpu", dtype=torch.bfloat16, enabled=USE_BF16):
+                model = torch.jit.trace(model, example_inputs, strict=False)
+
+        def run_model(inputs) -> np.ndarray:
+            global model
+            input_ids = torch.from_numpy(inputs["input_ids"]).to(DEVICE, non_blocking=True)
+            attention_mask = torch.from_numpy(inputs["attention_mask"]).to(DEVICE, non_blocking=True)
+            with torch.inference_mode(), torch.autocast("cpu", dtype=torch.bfloat16, enabled=USE_BF16):
+                try:
+                    outputs = model(input_ids, attention_mask)
+                except Exception as e:
+                    # Warmup only covers one shape; a later shape can still fail to compile or trace
+                    if model is eager_model:
+                        raise
+                    debug_log("error", f"Optimized toxicity model failed, falling back to eager mode: {e}")
+                    model = eager_model
+                    outputs = model(input_ids, attention_mask)
+            return outputs["logits"].float().cpu().numpy()
+
+    def classify_batch(texts: list[str]) -> np.ndarray:
+        # Pad only to the longest message in the batch, not to MAX_LENGTH
+        inputs = tokenizer(texts, return_tensors="np", padding=True, truncation=True, max_length=MAX_LENGTH)
+        return 1 / (1 + np.exp(-run_model(inputs)))
+
+    # Pay one-time graph optimization and allocation costs before the first real message
+    classify_batch(["warmup"])
+
+# -------------------- Toxicity Batching --------------------
+
+class ToxicityBatcher:
+    """Coalesce messages arriving within a short window into one padded model call."""
+
+    def __init__(self, max_batch_size: int = TOXICITY_BATCH_SIZE, max_wait_ms: int = TOXICITY_MAX_WAIT_MS):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.queue = None
+        self.task = None
+
+    def start(self):
+        if self.task is None:
+            self.queue = asyncio.Queue()
+            self.task = asyncio.create_task(self._run())
+
+    async def submit(self, text: str) -> np.ndarray:
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, future))
+        return await future
+
+    async def _collect(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            try:
+                results = await asyncio.to_thread(classify_batch, [text for text, _ in batch])
+            except Exception as e:
+                debug_log("error", f"Toxicity batch error: {e}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), probs in zip(batch, results):
+                if not future.done():
+                    future.set_result(probs)
+            debug_log("all", f"Classified toxicity batch of {len(batch)}")
 
-    def classify_text(text: str):
-        inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True)
-        outputs = model(**inputs)
-        probs = torch.sigmoid(outputs.logits)[0].tolist()
-        return dict(zip(labels, probs))
+if ENABLE_TOXICITY:
+    batcher = ToxicityBatcher()
 
 # -------------------- Permissions Checker --------------------
 REQUIRED_PERMS = [
@@ -69,52 +449,205 @@ REQUIRED_PERMS = [
     "embed_links",
     "use_application_commands",
 ]
+REQUIRED_MASK = discord.Permissions(**{p: True for p in REQUIRED_PERMS}).value
 
 async def check_permissions(guild: discord.Guild):
     """Check for missing permissions in all text channels."""
     missing = {}
     me = guild.me
     for channel in guild.text_channels:
-        perms = channel.permissions_for(me)
-        missing_in_channel = [p for p in REQUIRED_PERMS if not getattr(perms, p, False)]
-        if missing_in_channel:
-            missing[channel.name] = missing_in_channel
+        missing_mask = REQUIRED_MASK & ~channel.permissions_for(me).value
+        if missing_mask:
+            missing[channel.name] = [name for name, granted in discord.Permissions(missing_mask) if granted]
     if missing:
         debug_log("error", f"Missing permissions in {guild.name}: {missing}")
     return missing
 
+# -------------------- Caching --------------------
+class LFUCache:
+    """Bounded mapping that evicts the least frequently used entry, oldest first on ties.
+
+    With a ttl, entries also expire that many seconds after they were stored.
+    """
+
+    def __init__(self, maxsize: int, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.values = {}
+        self.expires = {}
+        self.freqs = {}
+        self.buckets: dict[int, OrderedDict] = {}
+        self.min_freq = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def _unlink(self, key) -> int:
+        freq = self.freqs[key]
+        bucket = self.buckets[freq]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[freq]
+            if self.min_freq == freq:
+                self.min_freq = freq + 1
+        return freq
+
+    def _touch(self, key):
+        freq = self._unlink(key) + 1
+        self.freqs[key] = freq
+        self.buckets.setdefault(freq, OrderedDict())[key] = None
+
+    def _remove(self, key):
+        self._unlink(key)
+        del self.values[key], self.freqs[key]
+        self.expires.pop(key, None)
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key in self.expires and self.expires[key] <= time.monotonic():
+                self._remove(key)
+            if key not in self.values:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._touch(key)
+            return self.values[key]
+
+    def put(self, key, value):
+        with self.lock:
+            if self.ttl is not None:
+                self.expires[key] = time.monotonic() + self.ttl
+            if key in self.values:
+                self.values[key] = value
+                self._touch(key)
+                return
+            if len(self.values) >= self.maxsize:
+                self._remove(next(iter(self.buckets[self.min_freq])))
+            self.values[key] = value
+            self.freqs[key] = 1
+            self.buckets.setdefault(1, OrderedDict())[key] = None
+            self.min_freq = 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self.values),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
 # -------------------- Helper Functions --------------------
+URL_RE = re.compile(r"https?://")
+
+def has_link(text: str) -> bool:
+    # The substring check rejects most messages without entering the regex engine
+    return "://" in text and URL_RE.search(text) is not None
+
+TRANSLATE_SEM = asyncio.Semaphore(16)
+TRANSLATE_TIMEOUT = aiohttp.ClientTimeout(total=3)
+TRANSLATE_CACHE_SIZE = 10_000
+TRANSLATE_CACHE_TTL = 3600.0
+TOXICITY_CACHE_SIZE = 50_000
+_XLATE = LFUCache(TRANSLATE_CACHE_SIZE, ttl=TRANSLATE_CACHE_TTL)
+_SOURCE_LANG = LFUCache(TRANSLATE_CACHE_SIZE, ttl=TRANSLATE_CACHE_TTL)
+_TOX_CACHE = LFUCache(TOXICITY_CACHE_SIZE)
+# Translations currently being fetched, so concurrent callers share one request
+_INFLIGHT: dict[tuple[bytes, str], asyncio.Task] = {}
+
+# After BREAKER_THRESHOLD consecutive failures for a language, skip translating into it for BREAKER_COOLDOWN seconds
+BREAKER_THRESHOLD = 3
+BREAKER_COOLDOWN = 30.0
+_FAILURES: dict[str, int] = {}
+_BREAKER_UNTIL: dict[str, float] = {}
+
+def _record_failure(target_lang: str):
+    _FAILURES[target_lang] = _FAILURES.get(target_lang, 0) + 1
+    if _FAILURES[target_lang] >= BREAKER_THRESHOLD:
+        _BREAKER_UNTIL[target_lang] = time.monotonic() + BREAKER_COOLDOWN
+        _FAILURES[target_lang] = 0
+        debug_log("error", f"Translation to {target_lang} failing; pausing for {BREAKER_COOLDOWN:.0f}s")
+
 async def translate_text(text: str, target_lang: str) -> str:
     if not ENABLE_TRANSLATION:
         return text
-    async with aiohttp.ClientSession() as session:
-        payload = {"q": text, "source": "auto", "target": target_lang}
+    digest = hashlib.blake2b(text.encode(), digest_size=16).digest()
+    if _SOURCE_LANG.get(digest) == target_lang:
+        return text
+    key = (digest, target_lang)
+    cached = _XLATE.get(key)
+    if cached is not None:
+        return cached
+    if _BREAKER_UNTIL.get(target_lang, 0) > time.monotonic():
+        return text
+    task = _INFLIGHT.get(key)
+    if task is None:
+        task = asyncio.create_task(_fetch_translation(text, digest, target_lang))
+        _INFLIGHT[key] = task
+        task.add_done_callback(lambda _: _INFLIGHT.pop(key, None))
+    # Shielded so one cancelled caller doesn't abort the request for the others
+    return await asyncio.shield(task)
+
+async def _fetch_translation(text: str, digest: bytes, target_lang: str) -> str:
+    payload = {"q": text, "source": "auto", "target": target_lang}
+    async with TRANSLATE_SEM:
         try:
-            async with session.post(TRANSLATE_URL, json=payload) as r:
-                if r.status == 200:
-                    js = await r.json()
-                    return js.get("translatedText", text)
-        except Exception as e:
-            debug_log("error", f"Translation error: {e}")
+            async with bot.http_session.post(TRANSLATE_URL, json=payload, timeout=TRANSLATE_TIMEOUT) as r:
+                if r.status != 200:
+                    debug_log("error", f"Translation to {target_lang} returned HTTP {r.status}")
+                    _record_failure(target_lang)
+                    return text
+                js = await r.json(loads=orjson.loads)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            debug_log("error", f"Translation error: {e!r}")
+            _record_failure(target_lang)
             return text
-    return text
-
-async def is_toxic(text: str):
+    _FAILURES.pop(target_lang, None)
+    translated = js.get("translatedText", text)
+    detected = js.get("detectedLanguage", {}).get("language")
+    if detected:
+        _SOURCE_LANG.put(digest, detected)
+    _XLATE.put((digest, target_lang), translated)
+    return translated
+
+NON_WORD_RE = re.compile(r"[\W_]+", re.UNICODE)
+# Common short replies that never need a model pass
+BENIGN_WORDS = frozenset({"gg", "lol", "lmao", "ok", "okay", "yes", "yep", "nope", "thanks", "thx", "ty", "hi", "hey", "hello", "bye", "nice", "cool"})
+WHITESPACE_RE = re.compile(r"\s+")
+
+def toxicity_cache_key(text: str) -> str:
+    # toxic-bert is uncased, so case and spacing differences classify identically
+    return WHITESPACE_RE.sub(" ", text.strip().lower())[:512]
+
+async def is_toxic(text: str) -> tuple[bool, np.ndarray | None]:
     if not ENABLE_TOXICITY:
-        return False, {}
-    scores = await asyncio.to_thread(classify_text, text)
-    return any(v > 0.5 for v in scores.values()), scores
+        return False, None
+    # Skip emoji/punctuation-only messages, anything under 3 letters or digits, and known-benign replies
+    stripped = NON_WORD_RE.sub("", text).lower()
+    if len(stripped) < 3 or stripped.isdigit() or stripped in BENIGN_WORDS:
+        return False, None
+    key = toxicity_cache_key(text)
+    probs = _TOX_CACHE.get(key)
+    if probs is None:
+        probs = await batcher.submit(text)
+        _TOX_CACHE.put(key, probs)
+    return bool((probs > 0.5).any()), probs
 
 async def add_warning(guild_id: int, user_id: int):
-    warnings = data["warnings"].setdefault(str(guild_id), {})
-    warnings[str(user_id)] = warnings.get(str(user_id), 0) + 1
-    save_data(data)
+    # Avoid setdefault allocating a throwaway dict for guilds that already have warnings
+    warnings = data["warnings"].get(guild_id)
+    if warnings is None:
+        warnings = data["warnings"][guild_id] = {}
+    warnings[user_id] = warnings.get(user_id, 0) + 1
+    mark_dirty(save_warning, guild_id, user_id)
 
 def get_warnings(guild_id: int, user_id: int) -> int:
-    return data["warnings"].get(str(guild_id), {}).get(str(user_id), 0)
+    return data["warnings"].get(guild_id, {}).get(user_id, 0)
 
-async def log_toxic_message(guild: discord.Guild, user: discord.User, message: discord.Message, scores: dict):
-    log_channel_id = data["logs"].get(str(guild.id))
+async def log_toxic_message(guild: discord.Guild, user: discord.User, message: discord.Message, probs: np.ndarray):
+    log_channel_id = data["logs"].get(guild.id)
     if not log_channel_id:
         return
     log_channel = guild.get_channel(log_channel_id)
@@ -122,105 +655,158 @@ async def log_toxic_message(guild: discord.Guild, user: discord.User, message: d
         embed = discord.Embed(title="Toxic Message Detected", color=discord.Color.red())
         embed.add_field(name="User", value=f"{user.mention}", inline=True)
         embed.add_field(name="Message", value=message.content or "[No content]", inline=False)
-        embed.add_field(name="Scores", value="\n".join([f"{k}: {v:.2f}" for k, v in scores.items()]))
+        embed.add_field(name="Scores", value="\n".join([f"{k}: {v:.2f}" for k, v in zip(labels, probs.tolist())]))
         await log_channel.send(embed=embed)
         debug_log("mod", f"Toxic message by {user} removed in {guild.name}")
 
 # -------------------- Webhook Sending --------------------
+_WH_CACHE: dict[int, discord.Webhook] = {}
+
+async def get_webhook(channel: discord.TextChannel) -> discord.Webhook:
+    """Return the sync webhook for a channel, resolving it over HTTP only on a cache miss."""
+    webhook = _WH_CACHE.get(channel.id)
+    if webhook:
+        return webhook
+    stored = data["webhooks"].get(channel.id)
+    if not stored or not stored["token"]:
+        existing = next((w for w in await channel.webhooks() if w.user == bot.user and w.token), None)
+        existing = existing or await channel.create_webhook(name="SyncBot")
+        stored = data["webhooks"][channel.id] = {"id": existing.id, "token": existing.token}
+        mark_dirty(save_webhook, channel.id)
+    webhook = discord.Webhook.partial(stored["id"], stored["token"], session=bot.http_session)
+    _WH_CACHE[channel.id] = webhook
+    return webhook
+
 async def send_to_channel(channel: discord.TextChannel, author: discord.User, content: str):
-    if re.search(r"https?://", content):
+    if has_link(content):
         debug_log("mod", f"Skipped link message from {author} in {channel.guild.name}")
         return
-    try:
-        wh_id = data["webhooks"].get(str(channel.id))
-        webhook = None
-        if wh_id:
-            try:
-                webhook = await bot.fetch_webhook(wh_id)
-            except discord.NotFound:
-                webhook = None
-        if not webhook:
-            webhook = await channel.create_webhook(name="SyncBot")
-            data["webhooks"][str(channel.id)] = webhook.id
-            save_data(data)
-        await webhook.send(
-            content=content,
-            username=author.display_name[:32],
-            avatar_url=author.display_avatar.url,
-            allowed_mentions=discord.AllowedMentions.none()
-        )
-        debug_log("mod", f"Forwarded message from {author} to {channel.guild.name}")
-    except discord.Forbidden:
-        debug_log("error", f"Missing webhook permissions in {channel.name}")
-    except Exception as e:
-        debug_log("error", f"Webhook error: {e}")
-
-# -------------------- Slash Commands --------------------
-@bot.tree.command(name="addchannel", description="Add this channel to the cross-server sync and set its language.")
-@app_commands.describe(lang="Language code (e.g., en, es, fr)")
-async def add_channel(interaction: discord.Interaction, lang: str):
-    await interaction.response.defer(ephemeral=True)
-
-    embed = discord.Embed(
-        title="Terms of Service for Cross-Server Sync Bot",
-        description=(
-            "By using this bot in your channel, you agree to the following terms:\n\n"
-            "**Content Restrictions:**\n"
-            "- NSFW, hateful, or illegal content is prohibited.\n"
-            "- Toxic messages may be automatically deleted.\n\n"
-            "**Message Handling:**\n"
-            "- Messages may be forwarded to other servers.\n"
-            "- Once sent, messages cannot be deleted or edited.\n\n"
-            "**Moderation:**\n"
-            "- Toxic messages will trigger warnings and may be logged.\n"
-            "- Repeated violations may result in removal from the sync system.\n\n"
-            "Do you accept these terms?"
-        ),
-        color=discord.Color.blue()
-    )
-    view = discord.ui.View(timeout=60)
+    # A cached webhook may have been deleted on Discord's side; re-resolve it and retry once
+    for _ in range(2):
+        try:
+            webhook = await get_webhook(channel)
+            await webhook.send(
+                content=content,
+                username=author.display_name[:32],
+                avatar_url=author.display_avatar.url,
+                allowed_mentions=discord.AllowedMentions.none()
+            )
+            debug_log("mod", f"Forwarded message from {author} to {channel.guild.name}")
+            return
+        except discord.NotFound:
+            _WH_CACHE.pop(channel.id, None)
+            data["webhooks"].pop(channel.id, None)
+            mark_dirty(save_webhook, channel.id)
+            debug_log("error", f"Webhook for {channel.name} was deleted; recreating it")
+        except discord.Forbidden:
+            debug_log("error", f"Missing webhook permissions in {channel.name}")
+            return
+        except Exception as e:
+            debug_log("error", f"Webhook error: {e}")
+            return
 
-    async def accept_callback(i: discord.Interaction):
-        data["channels"][str(interaction.channel.id)] = {
+# -------------------- Embeds --------------------
+# Static embeds are built once; discord.py only serializes them on send
+TOS_EMBED = discord.Embed(
+    title="Terms of Service for Cross-Server Sync Bot",
+    description=(
+        "By using this bot in your channel, you agree to the following terms:\n\n"
+        "**Content Restrictions:**\n"
+        "- NSFW, hateful, or illegal content is prohibited.\n"
+        "- Toxic messages may be automatically deleted.\n\n"
+        "**Message Handling:**\n"
+        "- Messages may be forwarded to other servers.\n"
+        "- Once sent, messages cannot be deleted or edited.\n\n"
+        "**Moderation:**\n"
+        "- Toxic messages will trigger warnings and may be logged.\n"
+        "- Repeated violations may result in removal from the sync system.\n\n"
+        "Do you accept these terms?"
+    ),
+    color=discord.Color.blue()
+)
+
+HELP_EMBED = discord.Embed(
+    title="Cross-Server Sync Bot Help",
+    description="Sync channels across servers, translate messages, and moderate toxic content.",
+    color=discord.Color.blue()
+)
+HELP_EMBED.add_field(
+    name="Commands",
+    value=(
+        "/addchannel [lang] - Add channel to sync.\n"
+        "/removechannel - Remove channel from sync.\n"
+        "/setlogschannel - Set logs channel.\n"
+        "/warnings [user] - Check user warnings.\n"
+        "/stats - Bot statistics.\n"
+        "/cachestats - Toxicity cache statistics.\n"
+        "/help - This message.\n"
+        "/announce [target/all] [message] - Owner announcement."
+    ),
+    inline=False
+)
+
+# -------------------- Views --------------------
+# The requested language travels in the ToS embed footer so the buttons can stay stateless
+TOS_LANG_PREFIX = "Language: "
+
+class ToSView(discord.ui.View):
+    """Persistent Accept/Decline buttons for the /addchannel terms prompt."""
+
+    def __init__(self):
+        super().__init__(timeout=None)
+
+    @discord.ui.button(label="Accept", style=discord.ButtonStyle.success, custom_id="tos_accept")
+    async def accept(self, interaction: discord.Interaction, button: discord.ui.Button):
+        lang = interaction.message.embeds[0].footer.text.removeprefix(TOS_LANG_PREFIX)
+        channel = interaction.channel
+        previous = data["channels"].get(channel.id)
+        if previous:
+            uncount_lang(previous["lang"])
+        LANG_COUNTS[lang] += 1
+        data["channels"][channel.id] = {
             "lang": lang,
             "guild_id": interaction.guild.id,
-            "channel_id": interaction.channel.id
+            "channel_id": channel.id
         }
-        save_data(data)
+        rebuild_sync_index()
+        await asyncio.to_thread(write_now, save_channel, channel.id)
         try:
             topic_text = f"This channel is synced via the cross-server bot.\nLanguage: {lang}\nPowered by: GloBot"
-            await interaction.channel.edit(topic=topic_text)
+            await channel.edit(topic=topic_text)
         except discord.Forbidden:
-            debug_log("error", f"Cannot edit channel topic in {interaction.channel.name}")
-        await i.response.edit_message(content="Channel added to the sync system.", embed=None, view=None)
-        debug_log("mod", f"Channel {interaction.channel.name} added to sync in {interaction.guild.name}")
-
-    async def decline_callback(i: discord.Interaction):
-        await i.response.edit_message(content="Action cancelled.", embed=None, view=None)
+            debug_log("error", f"Cannot edit channel topic in {channel.name}")
+        await interaction.response.edit_message(content="Channel added to the sync system.", embed=None, view=None)
+        debug_log("mod", f"Channel {channel.name} added to sync in {interaction.guild.name}")
 
-    accept_btn = discord.ui.Button(label="Accept", style=discord.ButtonStyle.success)
-    decline_btn = discord.ui.Button(label="Decline", style=discord.ButtonStyle.danger)
-    accept_btn.callback = accept_callback
-    decline_btn.callback = decline_callback
-    view.add_item(accept_btn)
-    view.add_item(decline_btn)
+    @discord.ui.button(label="Decline", style=discord.ButtonStyle.danger, custom_id="tos_decline")
+    async def decline(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.edit_message(content="Action cancelled.", embed=None, view=None)
 
-    await interaction.followup.send(embed=embed, view=view, ephemeral=True)
+# -------------------- Slash Commands --------------------
+@bot.tree.command(name="addchannel", description="Add this channel to the cross-server sync and set its language.")
+@app_commands.describe(lang="Language code (e.g., en, es, fr)")
+async def add_channel(interaction: discord.Interaction, lang: str):
+    await interaction.response.defer(ephemeral=True)
+    embed = TOS_EMBED.copy()
+    embed.set_footer(text=f"{TOS_LANG_PREFIX}{lang}")
+    await interaction.followup.send(embed=embed, view=ToSView(), ephemeral=True)
 
 @bot.tree.command(name="removechannel", description="Remove this channel from synced channels.")
 async def remove_channel(interaction: discord.Interaction):
-    cid = str(interaction.channel.id)
+    cid = interaction.channel.id
     if cid in data["channels"]:
+        uncount_lang(data["channels"][cid]["lang"])
         del data["channels"][cid]
-        save_data(data)
+        rebuild_sync_index()
+        await asyncio.to_thread(write_now, delete_channel, cid)
         await interaction.response.send_message("Channel removed successfully.", ephemeral=True)
     else:
         await interaction.response.send_message("This channel isn't synced.", ephemeral=True)
 
 @bot.tree.command(name="setlogschannel", description="Set this channel as the server's log channel.")
 async def set_logs(interaction: discord.Interaction):
-    data["logs"][str(interaction.guild.id)] = interaction.channel.id
-    save_data(data)
+    data["logs"][interaction.guild.id] = interaction.channel.id
+    await asyncio.to_thread(write_now, save_logs, interaction.guild.id)
     await interaction.response.send_message("Logs channel set.", ephemeral=True)
 
 @bot.tree.command(name="warnings", description="Check a user's warning count.")
@@ -234,41 +820,33 @@ async def warnings(interaction: discord.Interaction, user: discord.Member):
 
 @bot.tree.command(name="stats", description="View current bot statistics.")
 async def stats(interaction: discord.Interaction):
-    await interaction.response.defer(ephemeral=True)
     active_channels = len(data["channels"])
     total_servers = len(bot.guilds)
-    languages = [info["lang"] for info in data["channels"].values()]
-    lang_counter = Counter(languages)
-    most_used_langs = "\n".join(f"{lang}: {count}" for lang, count in lang_counter.most_common(5)) or "None"
+    most_used_langs = "\n".join(f"{lang}: {count}" for lang, count in LANG_COUNTS.most_common(5)) or "None"
 
     embed = discord.Embed(title="Bot Statistics", color=discord.Color.green())
     embed.add_field(name="Active Synced Channels", value=str(active_channels), inline=False)
     embed.add_field(name="Servers Bot is In", value=str(total_servers), inline=False)
     embed.add_field(name="Most Used Languages", value=most_used_langs, inline=False)
-    await interaction.followup.send(embed=embed, ephemeral=True)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="cachestats", description="View toxicity cache statistics.")
+async def cache_stats(interaction: discord.Interaction):
+    cache = _TOX_CACHE.stats()
+    embed = discord.Embed(title="Toxicity Cache", color=discord.Color.green())
+    embed.add_field(name="Entries", value=f"{cache['size']}/{cache['maxsize']}", inline=False)
+    embed.add_field(name="Hits", value=str(cache["hits"]), inline=True)
+    embed.add_field(name="Misses", value=str(cache["misses"]), inline=True)
+    embed.add_field(name="Hit Rate", value=f"{cache['hit_rate']:.1%}", inline=True)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
 
 @bot.tree.command(name="help", description="Get information about the bot and how to use it.")
 async def help_command(interaction: discord.Interaction):
     await interaction.response.defer(ephemeral=True)
-    embed = discord.Embed(
-        title="Cross-Server Sync Bot Help",
-        description="Sync channels across servers, translate messages, and moderate toxic content.",
-        color=discord.Color.blue()
-    )
-    embed.add_field(
-        name="Commands",
-        value=(
-            "/addchannel [lang] - Add channel to sync.\n"
-            "/removechannel - Remove channel from sync.\n"
-            "/setlogschannel - Set logs channel.\n"
-            "/warnings [user] - Check user warnings.\n"
-            "/stats - Bot statistics.\n"
-            "/help - This message.\n"
-            "/announce [target/all] [message] - Owner announcement."
-        ),
-        inline=False
-    )
-    await interaction.followup.send(embed=embed, ephemeral=True)
+    await interaction.followup.send(embed=HELP_EMBED, ephemeral=True)
+
+# Caps concurrent owner DMs during a broadcast announcement
+ANNOUNCE_SEM = asyncio.Semaphore(10)
 
 @bot.tree.command(name="announce", description="Send a message to a user or all server owners (bot owner only).")
 @app_commands.describe(target="User ID or 'all'", message="Message to send")
@@ -282,16 +860,21 @@ async def announce(interaction: discord.Interaction, target: str, message: str):
 
     content = f"**Announcement from GloBot:**\n{message}"
     sent = 0
+    await interaction.response.defer(ephemeral=True)
 
     if target.lower() == "all":
-        for guild in bot.guilds:
-            try:
-                owner = guild.owner or await bot.fetch_user(guild.owner_id)
-                if owner:
-                    await owner.send(content)
-                    sent += 1
-            except discord.Forbidden:
-                debug_log("error", f"Cannot DM owner of {guild.name}")
+        async def _dm_owner(guild: discord.Guild) -> int:
+            async with ANNOUNCE_SEM:
+                try:
+                    owner = guild.owner or await bot.fetch_user(guild.owner_id)
+                    if owner:
+                        await owner.send(content)
+                        return 1
+                except discord.HTTPException:
+                    debug_log("error", f"Cannot DM owner of {guild.name}")
+                return 0
+
+        sent = sum(await asyncio.gather(*(_dm_owner(guild) for guild in bot.guilds)))
 
     else:
         try:
@@ -300,12 +883,15 @@ async def announce(interaction: discord.Interaction, target: str, message: str):
             sent = 1
         except Exception as e:
             debug_log("error", f"Failed to send DM: {e}")
-            await interaction.response.send_message("Could not send message.", ephemeral=True)
+            await interaction.followup.send("Could not send message.", ephemeral=True)
             return
 
     await interaction.followup.send(f"Sent announcement to {sent} recipient(s).", ephemeral=True)
 
 # -------------------- Message Event --------------------
+# Caps concurrent webhook sends across all fan-outs to stay under Discord rate limits
+FORWARD_SEM = asyncio.Semaphore(20)
+
 @bot.event
 async def on_message(message: discord.Message):
     if message.author.bot:
@@ -314,43 +900,72 @@ async def on_message(message: discord.Message):
     channel_name = message.channel.name if hasattr(message.channel, "name") else "DM"
     debug_log("all", f"Received message in {guild_name}#{channel_name} from {message.author}")
 
-    if str(message.channel.id) not in data["channels"]:
+    if message.channel.id not in data["channels"]:
         return
 
-    if re.search(r"https?://", message.content):
+    if has_link(message.content):
         debug_log("mod", f"Skipped link in {message.guild.name}")
         return
 
+    # Target lookup overlaps with the toxicity check
+    resolve_task = asyncio.create_task(_resolve_targets(message.channel.id))
+
     if ENABLE_TOXICITY:
-        toxic_flag, scores = await is_toxic(message.content)
+        toxic_flag, probs = await is_toxic(message.content)
         if toxic_flag:
+            resolve_task.cancel()
             await add_warning(message.guild.id, message.author.id)
-            await log_toxic_message(message.guild, message.author, message, scores)
+            await log_toxic_message(message.guild, message.author, message, probs)
             await message.delete()
             return
 
-    lang = data["channels"][str(message.channel.id)]["lang"]
-    translated_text = await translate_text(message.content, lang)
-
-    for cid, info in data["channels"].items():
-        if int(cid) == message.channel.id:
-            continue
-        guild = bot.get_guild(info["guild_id"])
-        if not guild:
-            continue
-        target_channel = guild.get_channel(info["channel_id"])
-        if not target_channel:
-            continue
-        target_lang = info["lang"]
-        translated_text = await translate_text(message.content, target_lang)
-        await send_to_channel(target_channel, message.author, translated_text)
+    targets = await resolve_task
+
+    # Translate once per destination language, not once per destination channel
+    unique_langs = {target_lang for _, target_lang in targets}
+    translations = dict(zip(
+        unique_langs,
+        await asyncio.gather(*(translate_text(message.content, lang) for lang in unique_langs)),
+    ))
+
+    async def _forward_one(target_channel: discord.TextChannel, translated_text: str):
+        async with FORWARD_SEM:
+            await send_to_channel(target_channel, message.author, translated_text)
+
+    tasks = [
+        asyncio.create_task(_forward_one(target_channel, translations[target_lang]))
+        for target_channel, target_lang in targets
+    ]
+    for result in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(result, Exception):
+            debug_log("error", f"Forwarding error: {result}")
+
+@bot.event
+async def on_guild_channel_delete(channel: discord.abc.GuildChannel):
+    _CHANNEL_CACHE.pop(channel.id, None)
+
+@bot.event
+async def on_guild_remove(guild: discord.Guild):
+    evict_guild_channels(guild.id)
+
+@bot.event
+async def on_guild_unavailable(guild: discord.Guild):
+    evict_guild_channels(guild.id)
 
 # -------------------- Bot Ready --------------------
 @bot.event
 async def on_ready():
-    await bot.tree.sync()
+    # A fresh READY rebuilds every guild and channel object, so drop the old ones
+    _CHANNEL_CACHE.clear()
+    if SYNC_COMMANDS:
+        if SYNC_GUILD_ID:
+            guild = discord.Object(id=SYNC_GUILD_ID)
+            bot.tree.copy_global_to(guild=guild)
+            await bot.tree.sync(guild=guild)
+        else:
+            await bot.tree.sync()
+        debug_log("all", "Synced application commands")
     print(f"Logged in as {bot.user}")
-    for guild in bot.guilds:
-        await check_permissions(guild)
+    await asyncio.gather(*(check_permissions(guild) for guild in bot.guilds))
 
 bot.run(TOKEN)